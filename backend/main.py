@@ -10,11 +10,21 @@ from pathlib import Path
 
 from services.watermark_remover import WatermarkRemover
 from services.file_manager import FileManager
+from services.cost_estimator import CostEstimator
+from services.job_scheduler import JobScheduler, LaneBusyError
 from models.response_models import ProcessResponse, UploadResponse
 # Timeout configuration constants
 PROCESSING_TIMEOUT = 240  # 4 minutes
 MAX_FILE_SIZE_MB = 50     # 50MB limit
 
+# Cost-based admission (costs are estimated processing seconds)
+FAST_LANE_MAX_COST = 30             # Jobs up to this go to the fast lane
+MAX_JOB_COST = PROCESSING_TIMEOUT   # Jobs above this are rejected at upload
+FAST_LANE_CONCURRENCY = 4
+HEAVY_LANE_CONCURRENCY = 1
+QUEUE_TIMEOUT = 50                  # Queue wait + processing stays under the frontend's 5 minutes
+LANE_AGING_RATE = 4.0               # Cost seconds forgiven per second waited
+
 # Optional Sentry integration
 try:
     import sentry_sdk
@@ -51,6 +61,15 @@ app.add_middleware(
 # Initialize services
 watermark_remover = WatermarkRemover()
 file_manager = FileManager()
+cost_estimator = CostEstimator()
+job_scheduler = JobScheduler(
+    fast_lane_max_cost=FAST_LANE_MAX_COST,
+    max_job_cost=MAX_JOB_COST,
+    queue_timeout=QUEUE_TIMEOUT,
+    fast_lane_concurrency=FAST_LANE_CONCURRENCY,
+    heavy_lane_concurrency=HEAVY_LANE_CONCURRENCY,
+    aging_rate=LANE_AGING_RATE
+)
 
 @app.on_event("startup")
 async def startup_event():
@@ -117,6 +136,27 @@ async def upload_pdf(
         # Save uploaded file
         input_path = await file_manager.save_uploaded_file(file, file_id)
         
+        # Estimate processing cost so the job can be routed (or rejected) up front
+        estimate = await asyncio.to_thread(cost_estimator.estimate, input_path)
+        if not estimate["readable"]:
+            input_path.unlink(missing_ok=True)
+            logger.warning(f"Rejected {file_id}: PDF is password-protected or damaged")
+            raise HTTPException(
+                status_code=400,
+                detail="PDF is password-protected or too damaged to open. Please upload an unlocked, valid PDF."
+            )
+        if job_scheduler.is_over_budget(estimate["estimated_cost"]):
+            input_path.unlink(missing_ok=True)
+            logger.warning(f"Rejected {file_id}: estimated cost {estimate['estimated_cost']}s over budget")
+            raise HTTPException(
+                status_code=413,
+                detail=f"PDF too complex to process within {PROCESSING_TIMEOUT//60} minutes "
+                       f"({estimate['page_count']} pages, {estimate['image_count']} images). "
+                       "Try a smaller or simpler PDF."
+            )
+        estimate["lane"] = job_scheduler.select_lane(estimate["estimated_cost"])
+        file_manager.set_cost_estimate(file_id, estimate)
+        
         # Schedule cleanup
         background_tasks.add_task(
             file_manager.schedule_cleanup, 
@@ -124,15 +164,18 @@ async def upload_pdf(
             delay_minutes=10
         )
         
-        logger.info(f"File uploaded successfully: {file_id}")
+        logger.info(f"File uploaded successfully: {file_id} (estimated cost {estimate['estimated_cost']}s, {estimate['lane']} lane)")
         
         return UploadResponse(
             file_id=file_id,
             filename=file.filename,
             status="uploaded",
-            message="File uploaded successfully. Ready for processing."
+            message="File uploaded successfully. Ready for processing.",
+            cost_estimate=estimate
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Upload error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
@@ -151,18 +194,47 @@ async def remove_watermark(
         if not input_path.exists():
             raise HTTPException(status_code=404, detail="File not found")
         
-        # Set processing status
-        file_manager.set_file_status(file_id, "processing")
+        # Estimate may be missing if the server restarted since upload
+        estimate = file_manager.get_cost_estimate(file_id)
+        if estimate is None:
+            estimate = await asyncio.to_thread(cost_estimator.estimate, input_path)
+            estimate["lane"] = job_scheduler.select_lane(estimate["estimated_cost"])
+            file_manager.set_cost_estimate(file_id, estimate)
+        
+        if not estimate["readable"]:
+            raise HTTPException(
+                status_code=400,
+                detail="PDF is password-protected or too damaged to open. Please upload an unlocked, valid PDF."
+            )
+        
+        if job_scheduler.is_over_budget(estimate["estimated_cost"]):
+            raise HTTPException(
+                status_code=413,
+                detail=f"PDF too complex to process within {PROCESSING_TIMEOUT//60} minutes. Try a smaller or simpler PDF."
+            )
+        
+        file_manager.set_file_status(file_id, "queued")
         
         # Process the PDF with heavy ML processing for best accuracy
         try:
-            output_path = await asyncio.wait_for(
-                watermark_remover.process_pdf(file_id, input_path),
-                timeout=PROCESSING_TIMEOUT
-            )
+            async with job_scheduler.admit(file_id, estimate["estimated_cost"]):
+                file_manager.set_file_status(file_id, "processing")
+                
+                output_path = await asyncio.wait_for(
+                    watermark_remover.process_pdf(file_id, input_path),
+                    timeout=PROCESSING_TIMEOUT
+                )
             
             file_manager.set_file_status(file_id, "completed")
             
+        except LaneBusyError as e:
+            file_manager.set_file_status(file_id, "uploaded")
+            logger.warning(f"Lane busy for {file_id}: {e}")
+            raise HTTPException(
+                status_code=503,
+                detail="Server is busy processing other files. Please try again shortly.",
+                headers={"Retry-After": str(QUEUE_TIMEOUT)}
+            )
         except asyncio.TimeoutError:
             file_manager.set_file_status(file_id, "timeout")
             logger.error(f"Processing timeout for {file_id} after {PROCESSING_TIMEOUT} seconds")
@@ -245,6 +317,12 @@ async def get_processing_status(file_id: str):
             response["message"] = "Processing failed. Please try again."
         elif status == "processing":
             response["message"] = "Processing in progress..."
+        elif status == "queued":
+            response["message"] = "Waiting for a processing slot..."
+        
+        estimate = file_manager.get_cost_estimate(file_id)
+        if estimate is not None:
+            response["cost_estimate"] = estimate
         
         return response
         
@@ -252,6 +330,16 @@ async def get_processing_status(file_id: str):
         logger.error(f"Status check error for {file_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Status check failed: {str(e)}")
 
+@app.get("/lanes")
+async def get_lane_stats():
+    """
+    Processing lane load and estimated vs actual cost, for calibrating the estimator
+    """
+    return {
+        **job_scheduler.get_stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -2,11 +2,23 @@ from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
 
+class CostEstimate(BaseModel):
+    page_count: int
+    image_count: int
+    image_pixels: int
+    text_span_count: int
+    encrypted: bool
+    damaged: bool
+    readable: bool
+    estimated_cost: float  # Estimated processing seconds
+    lane: Optional[str] = None
+
 class UploadResponse(BaseModel):
     file_id: str
     filename: str
     status: str
     message: str
+    cost_estimate: Optional[CostEstimate] = None
     timestamp: Optional[datetime] = None
 
 class ProcessResponse(BaseModel):
@@ -0,0 +1,92 @@
+from pathlib import Path
+from typing import Dict, Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fitz  # PyMuPDF
+    FITZ_AVAILABLE = True
+except ImportError:
+    FITZ_AVAILABLE = False
+
+# Estimated processing seconds per unit of work. These are starting points;
+# compare against the per-lane actual/estimated ratio reported by the
+# scheduler and adjust.
+SECONDS_PER_PAGE = 0.5
+SECONDS_PER_IMAGE = 0.2
+SECONDS_PER_MEGAPIXEL = 0.3
+SECONDS_PER_TEXT_SPAN = 0.002
+
+
+class CostEstimator:
+    """Cheap upload-time cost estimate for a PDF, used to pick a processing lane"""
+
+    def estimate(self, pdf_path: Path) -> Dict[str, Any]:
+        """Open the PDF once and count pages, images and text spans without rendering"""
+        estimate = {
+            "page_count": 0,
+            "image_count": 0,
+            "image_pixels": 0,
+            "text_span_count": 0,
+            "encrypted": False,
+            "damaged": False,
+            "readable": True,  # False if PyMuPDF cannot open it or it needs a password
+            "estimated_cost": 0.0,
+        }
+
+        if not FITZ_AVAILABLE:
+            logger.warning("PyMuPDF not available - skipping cost estimation")
+            return estimate
+
+        try:
+            doc = fitz.open(pdf_path)
+        except Exception as e:
+            logger.warning(f"Could not open {pdf_path} for cost estimation: {e}")
+            estimate["damaged"] = True
+            estimate["readable"] = False
+            return estimate
+
+        try:
+            estimate["page_count"] = doc.page_count
+            # is_encrypted goes False once PyMuPDF has logged in with the empty
+            # user password, which hides owner-password-only restrictions
+            metadata = doc.metadata or {}
+            estimate["encrypted"] = bool(metadata.get("encryption")) or bool(doc.needs_pass)
+            estimate["damaged"] = bool(doc.is_repaired)
+
+            # Page contents are unreadable until the document is unlocked
+            if doc.needs_pass:
+                estimate["readable"] = False
+                return estimate
+
+            for page in doc:
+                try:
+                    for img in page.get_images(full=True):
+                        # (xref, smask, width, height, ...) - read from the
+                        # image dictionary, the stream is never decoded
+                        estimate["image_count"] += 1
+                        estimate["image_pixels"] += img[2] * img[3]
+
+                    text = page.get_text("dict", flags=0)
+                    for block in text.get("blocks", []):
+                        for line in block.get("lines", []):
+                            estimate["text_span_count"] += len(line.get("spans", []))
+                except Exception as e:
+                    logger.warning(f"Cost estimation failed on page {page.number} of {pdf_path}: {e}")
+                    estimate["damaged"] = True
+        finally:
+            doc.close()
+
+        estimate["estimated_cost"] = self._score(estimate)
+        return estimate
+
+    def _score(self, estimate: Dict[str, Any]) -> float:
+        """Convert raw counts into estimated processing seconds"""
+        return round(
+            estimate["page_count"] * SECONDS_PER_PAGE
+            + estimate["image_count"] * SECONDS_PER_IMAGE
+            + estimate["image_pixels"] / 1_000_000 * SECONDS_PER_MEGAPIXEL
+            + estimate["text_span_count"] * SECONDS_PER_TEXT_SPAN,
+            2,
+        )
@@ -2,6 +2,7 @@ import os
 import asyncio
 import aiofiles
 from pathlib import Path
+from typing import Optional, Dict, Any
 from datetime import datetime, timedelta
 from fastapi import UploadFile
 import logging
@@ -14,6 +15,7 @@ class FileManager:
         self.output_dir = Path("./outputs")
         self.cleanup_interval = 600  # 10 minutes in seconds
         self.file_status = {}  # In-memory status tracking
+        self.file_estimates = {}  # In-memory cost estimates from upload
         
     def ensure_directories(self):
         """Create necessary directories if they don't exist"""
@@ -62,6 +64,14 @@ class FileManager:
         self.file_status[file_id] = status
         logger.info(f"Status updated for {file_id}: {status}")
     
+    def get_cost_estimate(self, file_id: str) -> Optional[Dict[str, Any]]:
+        """Get the upload-time cost estimate of a file"""
+        return self.file_estimates.get(file_id)
+    
+    def set_cost_estimate(self, file_id: str, estimate: Dict[str, Any]):
+        """Store the upload-time cost estimate of a file"""
+        self.file_estimates[file_id] = estimate
+    
     async def cleanup_old_files(self):
         """Background task to cleanup old files"""
         while True:
@@ -92,6 +102,7 @@ class FileManager:
         
         input_path = self.get_input_path(file_id)
         output_path = self.get_output_path(file_id)
+        self.file_estimates.pop(file_id, None)
         
         for path in [input_path, output_path]:
             try:
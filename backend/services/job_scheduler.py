@@ -0,0 +1,201 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LaneBusyError(Exception):
+    """Raised when a job cannot get a lane slot within the queue deadline"""
+
+
+class ProcessingLane:
+    """Concurrency-capped lane that admits waiting jobs cheapest-first, with aging"""
+
+    def __init__(self, name: str, max_concurrency: int, aging_rate: float = 0.0):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        # Estimated seconds of cost forgiven per second spent waiting, so
+        # expensive jobs cannot be passed over forever
+        self.aging_rate = aging_rate
+        self.active = 0
+        self._running: Dict[int, Tuple[float, float]] = {}  # token -> (cost, started_at)
+        self._waiters: List[Tuple[float, int, float, asyncio.Future]] = []
+        self._counter = itertools.count()
+
+        # Calibration totals, from successful runs only
+        self.completed_jobs = 0
+        self.total_estimated_cost = 0.0
+        self.total_actual_cost = 0.0
+        self.failed_jobs = 0
+        self.timed_out_jobs = 0
+
+    def estimated_wait(self) -> float:
+        """Estimated seconds a newly queued job waits, from remaining running and queued cost"""
+        now = time.monotonic()
+        remaining_cost = sum(
+            max(0.0, cost - (now - started_at)) for cost, started_at in self._running.values()
+        )
+        queued_cost = sum(cost for _, _, cost, _ in self._waiters)
+        return (remaining_cost + queued_cost) / self.max_concurrency
+
+    def start_job(self, cost: float) -> int:
+        """Track an admitted job's estimate and start time; returns a token for finish_job"""
+        token = next(self._counter)
+        self._running[token] = (cost, time.monotonic())
+        return token
+
+    def finish_job(self, token: int):
+        """Stop tracking a job started with start_job"""
+        self._running.pop(token, None)
+
+    async def acquire(self, cost: float):
+        """Wait for a slot; among queued jobs the lowest aged cost goes first"""
+        if self.active < self.max_concurrency and not self._waiters:
+            self.active += 1
+            return
+
+        # Ordering by cost - aging_rate * waited is the same for every waiter
+        # as ordering by cost + aging_rate * enqueue_time, so the key is fixed
+        priority = cost + self.aging_rate * time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._counter), cost, future)
+        heapq.heappush(self._waiters, entry)
+        try:
+            # The releasing job hands its slot over directly, so active is
+            # not touched here
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Slot was handed over just as we were cancelled - pass it on
+                self.release()
+            elif entry in self._waiters:
+                # release() may already have popped and skipped it
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            raise
+
+    def release(self):
+        """Hand the slot to the highest-priority waiting job, or free it"""
+        while self._waiters:
+            _, _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    def record(self, estimated_cost: float, actual_cost: float):
+        """Record a successfully finished job for estimator calibration"""
+        self.completed_jobs += 1
+        self.total_estimated_cost += estimated_cost
+        self.total_actual_cost += actual_cost
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Lane load and estimated vs actual cost totals"""
+        return {
+            "lane": self.name,
+            "max_concurrency": self.max_concurrency,
+            "active": self.active,
+            "queued": len(self._waiters),
+            "estimated_wait": round(self.estimated_wait(), 2),
+            "completed_jobs": self.completed_jobs,
+            "failed_jobs": self.failed_jobs,
+            "timed_out_jobs": self.timed_out_jobs,
+            "total_estimated_cost": round(self.total_estimated_cost, 2),
+            "total_actual_cost": round(self.total_actual_cost, 2),
+            "actual_to_estimated_ratio": (
+                round(self.total_actual_cost / self.total_estimated_cost, 3)
+                if self.total_estimated_cost > 0 else None
+            ),
+        }
+
+
+class JobScheduler:
+    """Routes processing jobs into fast/heavy lanes by estimated cost"""
+
+    def __init__(
+        self,
+        fast_lane_max_cost: float,
+        max_job_cost: float,
+        queue_timeout: float,
+        fast_lane_concurrency: int = 4,
+        heavy_lane_concurrency: int = 1,
+        aging_rate: float = 4.0,
+    ):
+        self.fast_lane_max_cost = fast_lane_max_cost
+        self.max_job_cost = max_job_cost
+        self.queue_timeout = queue_timeout
+        self.lanes = {
+            "fast": ProcessingLane("fast", fast_lane_concurrency, aging_rate),
+            "heavy": ProcessingLane("heavy", heavy_lane_concurrency, aging_rate),
+        }
+
+    def select_lane(self, estimated_cost: float) -> str:
+        """Pick the lane for a job of the given estimated cost"""
+        return "fast" if estimated_cost <= self.fast_lane_max_cost else "heavy"
+
+    def is_over_budget(self, estimated_cost: float) -> bool:
+        """Whether a job is too expensive to accept at all"""
+        return estimated_cost > self.max_job_cost
+
+    @asynccontextmanager
+    async def admit(self, file_id: str, estimated_cost: float):
+        """Hold a lane slot for the duration of the block and record its actual cost if it succeeds
+
+        Raises LaneBusyError if the lane backlog means the job would wait longer
+        than the queue deadline, or if no slot frees up before the deadline.
+        """
+        lane = self.lanes[self.select_lane(estimated_cost)]
+
+        estimated_wait = lane.estimated_wait()
+        if estimated_wait > self.queue_timeout:
+            raise LaneBusyError(
+                f"{lane.name} lane backlog too large (estimated wait {estimated_wait:.0f}s)"
+            )
+
+        queued_at = time.monotonic()
+        try:
+            await asyncio.wait_for(lane.acquire(estimated_cost), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise LaneBusyError(
+                f"No {lane.name} lane slot within {self.queue_timeout:.0f}s"
+            ) from None
+        started_at = time.monotonic()
+        token = lane.start_job(estimated_cost)
+        logger.info(
+            f"Admitted {file_id} to {lane.name} lane "
+            f"(estimated {estimated_cost:.1f}s, waited {started_at - queued_at:.1f}s)"
+        )
+
+        try:
+            yield lane.name
+        except asyncio.TimeoutError:
+            lane.timed_out_jobs += 1
+            raise
+        except BaseException:
+            lane.failed_jobs += 1
+            raise
+        else:
+            # Timeouts and failures would skew the actual/estimated ratio
+            actual_cost = time.monotonic() - started_at
+            lane.record(estimated_cost, actual_cost)
+            logger.info(
+                f"Finished {file_id} in {lane.name} lane "
+                f"(estimated {estimated_cost:.1f}s, actual {actual_cost:.1f}s)"
+            )
+        finally:
+            lane.finish_job(token)
+            lane.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-lane stats plus the admission thresholds"""
+        return {
+            "fast_lane_max_cost": self.fast_lane_max_cost,
+            "max_job_cost": self.max_job_cost,
+            "queue_timeout": self.queue_timeout,
+            "lanes": [lane.get_stats() for lane in self.lanes.values()],
+        }
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Test script for upload-time cost estimation and cost-based processing lanes.
+Run directly or with pytest from the backend directory.
+"""
+
+import asyncio
+import sys
+import tempfile
+import types
+from pathlib import Path
+from unittest.mock import patch
+
+from services.job_scheduler import JobScheduler, LaneBusyError, ProcessingLane
+
+
+def test_cheapest_first_admission():
+    """Queued jobs are admitted lowest estimated cost first"""
+    async def run():
+        lane = ProcessingLane("test", max_concurrency=1)
+        await lane.acquire(0)  # Occupy the only slot
+        order = []
+
+        async def job(name, cost):
+            await lane.acquire(cost)
+            order.append(name)
+            lane.release()
+
+        tasks = [asyncio.create_task(job(name, cost)) for name, cost in [("b", 20), ("c", 5), ("d", 15)]]
+        await asyncio.sleep(0)  # Let every job queue up
+        lane.release()
+        await asyncio.gather(*tasks)
+
+        assert order == ["c", "d", "b"], order
+        assert lane.active == 0
+
+    asyncio.run(run())
+
+
+def test_cancelled_waiter_releases_slot():
+    """A cancelled waiter leaves the queue, and a slot handed to it is passed on"""
+    async def run():
+        lane = ProcessingLane("test", max_concurrency=1)
+        await lane.acquire(0)
+
+        # Cancelled while still queued: removed without taking a slot
+        queued = asyncio.create_task(lane.acquire(1))
+        await asyncio.sleep(0)
+        queued.cancel()
+        await asyncio.gather(queued, return_exceptions=True)
+        assert lane.get_stats()["queued"] == 0
+
+        # Cancelled right after being handed the slot: passes it to the next waiter
+        first = asyncio.create_task(lane.acquire(1))
+        second = asyncio.create_task(lane.acquire(2))
+        await asyncio.sleep(0)
+        lane.release()  # Hands the slot to first
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        await asyncio.wait_for(second, timeout=1)
+        assert lane.active == 1
+
+        lane.release()
+        assert lane.active == 0
+
+    asyncio.run(run())
+
+
+def test_cancel_then_release_before_waiter_resumes():
+    """A waiter cancelled and then skipped by release() still ends with CancelledError"""
+    async def run():
+        lane = ProcessingLane("test", max_concurrency=1)
+        await lane.acquire(0)
+
+        waiter = asyncio.create_task(lane.acquire(1))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        lane.release()  # Pops the cancelled waiter before it resumes
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            pass
+        else:
+            raise AssertionError("waiter was not cancelled")
+        assert lane.active == 0
+        assert lane.get_stats()["queued"] == 0
+
+    asyncio.run(run())
+
+
+def test_heavy_job_queues_behind_nearly_finished_job():
+    """Backlog check uses the running job's remaining estimate, not its full cost"""
+    async def run():
+        scheduler = JobScheduler(fast_lane_max_cost=30, max_job_cost=240, queue_timeout=50,
+                                 heavy_lane_concurrency=1)
+        with patch("services.job_scheduler.time") as clock:
+            clock.monotonic.return_value = 1000.0
+            running_done = asyncio.Event()
+            order = []
+
+            async def heavy_job(file_id, cost, hold=None):
+                async with scheduler.admit(file_id, cost):
+                    order.append(file_id)
+                    if hold is not None:
+                        await hold.wait()
+
+            running = asyncio.create_task(heavy_job("running", 100, running_done))
+            await asyncio.sleep(0.01)
+
+            # 90s of the running job's estimate left: too long to queue behind
+            clock.monotonic.return_value = 1010.0
+            try:
+                await heavy_job("early", 100)
+            except LaneBusyError:
+                pass
+            else:
+                raise AssertionError("job queued behind a long running job")
+
+            # 40s left: within the queue deadline, so the job waits for the slot
+            clock.monotonic.return_value = 1060.0
+            queued = asyncio.create_task(heavy_job("queued", 100))
+            await asyncio.sleep(0.01)
+            assert scheduler.lanes["heavy"].get_stats()["queued"] == 1
+
+            running_done.set()
+            await asyncio.gather(running, queued)
+            assert order == ["running", "queued"], order
+
+    asyncio.run(run())
+
+
+class FakeWatermarkRemover:
+    """Stand-in for the ML-backed WatermarkRemover so main imports without it"""
+
+    async def process_pdf(self, file_id, input_path):
+        return input_path
+
+
+def _import_main():
+    """Import main with services.watermark_remover stubbed out"""
+    stub = types.ModuleType("services.watermark_remover")
+    stub.WatermarkRemover = FakeWatermarkRemover
+    with patch.dict(sys.modules, {"services.watermark_remover": stub}):
+        sys.modules.pop("main", None)
+        import main
+    return main
+
+
+def _make_estimate(**overrides):
+    """Cost estimate dict as returned by CostEstimator.estimate"""
+    estimate = {
+        "page_count": 3,
+        "image_count": 0,
+        "image_pixels": 0,
+        "text_span_count": 10,
+        "encrypted": False,
+        "damaged": False,
+        "readable": True,
+        "estimated_cost": 1.5,
+    }
+    estimate.update(overrides)
+    return estimate
+
+
+def _upload(main, tmp, estimate):
+    """POST a placeholder PDF to /upload with a mocked cost estimate"""
+    from fastapi.testclient import TestClient
+
+    with patch.object(main.file_manager, "upload_dir", Path(tmp)), \
+            patch.object(main.cost_estimator, "estimate", return_value=estimate):
+        client = TestClient(main.app)
+        return client.post(
+            "/upload",
+            files={"file": ("deck.pdf", b"%PDF-1.4 placeholder", "application/pdf")}
+        )
+
+
+def test_over_budget_upload_rejected():
+    """Uploads whose estimated cost exceeds the budget get a 413 and are deleted"""
+    main = _import_main()
+    estimate = _make_estimate(page_count=150, image_count=600, image_pixels=600 * 4_000_000,
+                              estimated_cost=main.MAX_JOB_COST + 1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        response = _upload(main, tmp, estimate)
+
+        assert response.status_code == 413, response.text
+        assert not list(Path(tmp).glob("*.pdf"))
+
+
+def test_unreadable_upload_rejected():
+    """Uploads PyMuPDF cannot open, or that need a password, get a 400 and are deleted"""
+    main = _import_main()
+    estimate = _make_estimate(page_count=0, text_span_count=0, damaged=True,
+                              readable=False, estimated_cost=0.0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        response = _upload(main, tmp, estimate)
+
+        assert response.status_code == 400, response.text
+        assert not list(Path(tmp).glob("*.pdf"))
+
+
+def test_busy_lane_returns_503():
+    """Processing returns 503 with Retry-After when the lane backlog exceeds the deadline"""
+    from fastapi.testclient import TestClient
+
+    main = _import_main()
+    file_id = "busy-lane-test"
+    lane = main.job_scheduler.lanes["fast"]
+
+    with tempfile.TemporaryDirectory() as tmp, \
+            patch.object(main.file_manager, "upload_dir", Path(tmp)), \
+            patch.object(lane, "estimated_wait", return_value=main.QUEUE_TIMEOUT + 1):
+        (Path(tmp) / f"{file_id}.pdf").write_bytes(b"%PDF-1.4 placeholder")
+        main.file_manager.set_cost_estimate(file_id, _make_estimate())
+
+        client = TestClient(main.app)
+        response = client.post(f"/remove_watermark/{file_id}")
+
+        assert response.status_code == 503, response.text
+        assert response.headers["Retry-After"] == str(main.QUEUE_TIMEOUT)
+        assert main.file_manager.get_file_status(file_id) == "uploaded"
+
+
+def test_estimator_counts():
+    """Estimator reports known page, image and text span counts for a generated PDF"""
+    import fitz
+    from services.cost_estimator import CostEstimator
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = Path(tmp) / "generated.pdf"
+        doc = fitz.open()
+        for _ in range(3):
+            page = doc.new_page()
+            page.insert_text((72, 72), "First line of text")
+            page.insert_text((72, 100), "Second line of text")
+        pixmap = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 200, 150), 0)
+        doc[0].insert_image(fitz.Rect(0, 200, 100, 300), pixmap=pixmap)
+        doc.save(pdf_path)
+        doc.close()
+
+        estimate = CostEstimator().estimate(pdf_path)
+
+        assert estimate["page_count"] == 3
+        assert estimate["image_count"] == 1
+        assert estimate["image_pixels"] == 200 * 150
+        assert estimate["text_span_count"] == 6
+        assert estimate["readable"] and not estimate["encrypted"] and not estimate["damaged"]
+        assert estimate["estimated_cost"] > 0
+
+
+def test_estimator_encryption():
+    """Owner-password PDFs are encrypted but readable; user-password PDFs are unreadable"""
+    import fitz
+    from services.cost_estimator import CostEstimator
+
+    with tempfile.TemporaryDirectory() as tmp:
+        owner_only = Path(tmp) / "owner_only.pdf"
+        user_password = Path(tmp) / "user_password.pdf"
+        doc = fitz.open()
+        doc.new_page().insert_text((72, 72), "Restricted deck")
+        doc.save(owner_only, encryption=fitz.PDF_ENCRYPT_AES_256, owner_pw="owner",
+                 permissions=fitz.PDF_PERM_ACCESSIBILITY)
+        doc.save(user_password, encryption=fitz.PDF_ENCRYPT_AES_256, owner_pw="owner",
+                 user_pw="user")
+        doc.close()
+
+        estimate = CostEstimator().estimate(owner_only)
+        assert estimate["encrypted"] and estimate["readable"], estimate
+        assert estimate["text_span_count"] == 1
+
+        estimate = CostEstimator().estimate(user_password)
+        assert estimate["encrypted"] and not estimate["readable"], estimate
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Testing Cost Estimation and Processing Lanes")
+    print("=" * 50)
+
+    tests = [
+        ("Cheapest-first admission", test_cheapest_first_admission),
+        ("Cancelled waiter releases slot", test_cancelled_waiter_releases_slot),
+        ("Cancel then release before waiter resumes", test_cancel_then_release_before_waiter_resumes),
+        ("Heavy job queues behind nearly finished job", test_heavy_job_queues_behind_nearly_finished_job),
+        ("Over-budget upload rejected", test_over_budget_upload_rejected),
+        ("Unreadable upload rejected", test_unreadable_upload_rejected),
+        ("Busy lane returns 503", test_busy_lane_returns_503),
+        ("Estimator counts", test_estimator_counts),
+        ("Estimator encryption", test_estimator_encryption),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            print(f"✅ PASS - {test_name}")
+            passed += 1
+        except Exception as e:
+            print(f"❌ FAIL - {test_name}: {e}")
+
+    print(f"\n🎯 Score: {passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -45,11 +45,24 @@ api.interceptors.response.use(
   }
 );
 
+export interface CostEstimate {
+  page_count: number;
+  image_count: number;
+  image_pixels: number;
+  text_span_count: number;
+  encrypted: boolean;
+  damaged: boolean;
+  readable: boolean;
+  estimated_cost: number;
+  lane?: string;
+}
+
 export interface UploadResponse {
   file_id: string;
   filename: string;
   status: string;
   message: string;
+  cost_estimate?: CostEstimate;
   timestamp?: string;
 }
 